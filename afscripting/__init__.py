@@ -7,7 +7,10 @@ __version_info__ = (3,0,1)
 __version__ = '.'.join([str(n) for n in __version_info__])
 
 try:
-    from . import args, options, utils
+    from . import (
+        args, cache, configwatcher, inputfiles, jsonlog, options, timeaxis,
+        tracing, utils
+    )
 except:
     # This should only happen when __version__ is being
     # imported in setup.py, so just ignore
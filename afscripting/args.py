@@ -3,26 +3,40 @@ __author__      = "Joel Dubowy"
 import configparser
 import copy
 import datetime
+import glob
+import hashlib
+import importlib
 import json
 import logging
 import os
 import re
+import resource
+import shutil
+import sys
 from argparse import (
-    ArgumentTypeError, ArgumentParser, Action, RawTextHelpFormatter
+    ArgumentTypeError, ArgumentParser, Action, Namespace,
+    RawTextHelpFormatter, SUPPRESS
 )
 
 from afdatetime.parsing import parse as parse_datetime
 from afconfig import merge_configs, set_config_value
 
+from . import __version__, tracing
+from .inputfiles import InputFile, InputFileGlob
+from .jsonlog import JSONFormatter
+from .timeaxis import TimeAxis, parse_timedelta
 from .utils import exit_with_msg
 
 __all__ = [
     # Argument Parsing
     'parse_args',
+    'add_subcommands',
     # Argument Action Callbacks
     'SetConfigOptionAction',
     'ExtractAndSetKeyValueAction',
     'ParseDatetimeAction',
+    'ParseTimeAxisAction',
+    'InputFileAction',
     'append_or_split_with_delimiter_and_extend',
     'AppendOrSplitAndExtendAction',
     'ConfigOptionAction',
@@ -30,7 +44,19 @@ __all__ = [
     'IntegerConfigOptionAction',
     'FloatConfigOptionAction',
     'JSONConfigOptionAction',
-    'ConfigFileAction'
+    'load_config_file',
+    'ConfigFileAction',
+    # Logging
+    'set_log_level',
+    # Resources
+    'parse_positive_int',
+    'parse_cpu_list',
+    'parse_memory_size',
+    'add_resource_options',
+    'configure_resources_from_args',
+    # Tracing
+    'add_tracing_options',
+    'configure_tracing_from_args'
 ]
 
 ##
@@ -41,7 +67,9 @@ __all__ = [
 
 def parse_args(required_args, optional_args, positional_args=None, usage=None,
         epilog=None, post_args_outputter=None, pre_validation=None,
-        support_configuration_options_short_names=False):
+        support_configuration_options_short_names=False,
+        support_resource_options=False, subcommands=None,
+        help_cache_dir=None):
     """....
 
     Arguments:
@@ -51,37 +79,94 @@ def parse_args(required_args, optional_args, positional_args=None, usage=None,
      - usage -- usage text to replace default
      - epilog -- additional help text to display after list of args
      - post_args_outputter -- callable object that generates epilog
-        (for when itneeds to be dynamically generated)
+        (for when itneeds to be dynamically generated); it's only called
+        if help is displayed
      - pre_validation -- callable object that performs any tasks that
         should be done before outputing the parsed args
      - support_configuration_options_short_names -- e.g. '-c', '-C', '-B', etc.
+     - support_resource_options -- add '--workers', '--cpu-affinity', etc.
+        and apply them (see configure_resources_from_args); parse_args
+        should then be called before importing numpy or other libraries
+        that size thread pools on import
+     - subcommands -- list of subcommand specs, each a dict with 'name',
+        'module' (module path), and optional 'help' (see note below)
+     - help_cache_dir -- if specified, rendered help text is cached in this
+        directory, keyed by the modification times of the script and of
+        the module calling parse_args, so that post_args_outputter isn't
+        called again until either changes. The caller's module is included
+        because, for console_scripts entry points, the script is a
+        generated wrapper that isn't modified when the package is
+        upgraded. Help that depends on other files (e.g. the scanned
+        directories) may be stale until the cache dir is cleared
+
+    Subcommands:
+
+    Each subcommand's module is imported only if that subcommand is
+    chosen (or its help is requested), so top level --help and other
+    subcommands don't pay for its imports. The module may define
+    REQUIRED_ARGS, OPTIONAL_ARGS, and POSITIONAL_ARGS, in the same format
+    as parse_args' args. The chosen subcommand's name and module are set
+    in args.subcommand and args.subcommand_module. Logging, configuration,
+    and other shared options may be given before or after the subcommand
+    name; config options and files given in both places are merged.
 
     TODO:
      - support custom positional args
     """
-    parser = ArgumentParser(usage=usage)
-
-    if epilog or post_args_outputter:
-        parser.epilog = epilog or post_args_outputter()
-        parser.formatter_class = RawTextHelpFormatter
-
-    add_arguments(parser, required_args, required=True)
-    add_arguments(parser, optional_args)
-    if positional_args:
-        add_arguments(parser, positional_args)
-
-    add_logging_options(parser)
-    add_configuration_options(parser,
-        support_configuration_options_short_names)
-
-    args = parser.parse_args()
-
-    configure_logging_from_args(args)
-
-    if pre_validation:
-        pre_validation(parser, args)
-
-    output_args(args)
+    # --trace-output is parsed up front so that config file loading
+    # and the rest of parse_args can be traced
+    # allow_abbrev is disabled so that script options that are prefixes of
+    # --trace-output (e.g. --trace) are left alone
+    tracing_parser = ArgumentParser(add_help=False, allow_abbrev=False)
+    add_tracing_options(tracing_parser)
+    tracing_args, _ = tracing_parser.parse_known_args()
+    configure_tracing_from_args(tracing_args)
+
+    with tracing.span('parse_args'):
+        parser = _LazyHelpArgumentParser(usage=usage, epilog=epilog,
+            epilog_generator=None if epilog else post_args_outputter,
+            help_cache_dir=help_cache_dir,
+            help_cache_key_files=[sys._getframe(1).f_globals.get('__file__')])
+
+        if epilog or post_args_outputter:
+            parser.formatter_class = RawTextHelpFormatter
+
+        add_arguments(parser, required_args, required=True)
+        add_arguments(parser, optional_args)
+        if positional_args:
+            add_arguments(parser, positional_args)
+
+        add_logging_options(parser)
+        add_configuration_options(parser,
+            support_configuration_options_short_names)
+        if support_resource_options:
+            add_resource_options(parser)
+        add_tracing_options(parser)
+
+        namespace = Namespace()
+        if subcommands:
+            shared_options = (LOGGING_OPTIONS
+                + get_configuration_options(
+                    support_configuration_options_short_names)
+                + (RESOURCE_OPTIONS if support_resource_options else [])
+                + TRACING_OPTIONS)
+            add_subcommands(parser, subcommands,
+                shared_options=shared_options, namespace=namespace)
+
+        with tracing.span('parse_args.parse'):
+            args = parser.parse_args(namespace=namespace)
+
+        with tracing.span('parse_args.configure_logging'):
+            configure_logging_from_args(args)
+        if support_resource_options:
+            with tracing.span('parse_args.configure_resources'):
+                configure_resources_from_args(args)
+
+        if pre_validation:
+            with tracing.span('parse_args.pre_validation'):
+                pre_validation(parser, args)
+
+        output_args(args)
 
     return parser, args
 
@@ -140,6 +225,75 @@ class ParseDatetimeAction(Action):
                 value, option_string))
         setattr(namespace, self.dest, dt)
 
+class ParseTimeAxisAction(Action):
+
+    def __call__(self, parser, namespace, value, option_string=None):
+        """Parses 'START/END[/STEP]' into a lazy TimeAxis
+
+        Note: START and END are parsed like ParseDatetimeAction values,
+        and END is inclusive. STEP is of the form '1h', '15m', '1d', etc.,
+        and defaults to one hour.
+        """
+        parts = value.strip().split('/')
+        if len(parts) not in (2, 3):
+            raise ArgumentTypeError("Invalid time range '%s' for option %s "
+                "- must be of the form 'START/END[/STEP]'" % (
+                value, option_string))
+        try:
+            start = parse_datetime(parts[0])
+            end = parse_datetime(parts[1])
+        except ValueError:
+            raise ArgumentTypeError("Invalid datetime format in time range "
+                "'%s' for option %s" % (value, option_string))
+        if end < start:
+            raise ArgumentTypeError("End precedes start in time range "
+                "'%s' for option %s" % (value, option_string))
+        try:
+            if len(parts) == 3:
+                time_axis = TimeAxis(start, end, parse_timedelta(parts[2]))
+            else:
+                time_axis = TimeAxis(start, end)
+        except ValueError as e:
+            raise ArgumentTypeError("Invalid time step in time range "
+                "'%s' for option %s - %s" % (value, option_string, e))
+        setattr(namespace, self.dest, time_axis)
+
+class InputFileAction(Action):
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        """Validates input file paths and stores them as lazily opened
+        InputFile objects
+
+        Note: Glob patterns are stored as InputFileGlob objects, which
+        generate matching InputFile objects on iteration; at parse time,
+        it's only verified that there's at least one match. Use
+        afscripting.inputfiles.iter_input_files to iterate over a mix
+        of files and globs (e.g. with nargs='+').
+        """
+        if isinstance(values, list):
+            setattr(namespace, self.dest,
+                [self._validate(v, option_string) for v in values])
+        else:
+            setattr(namespace, self.dest, self._validate(values, option_string))
+
+    def _validate(self, value, option_string):
+        value = value.strip()
+        # existing paths are taken literally, even if they contain glob
+        # characters, e.g. 'data[1].csv'
+        if os.path.isfile(value):
+            return InputFile(value)
+
+        if glob.escape(value) != value:
+            # check for at least one match without expanding the whole glob
+            if not any(os.path.isfile(f)
+                    for f in glob.iglob(value, recursive=True)):
+                raise ArgumentTypeError("No files match '%s' for %s" % (
+                    value, option_string or self.dest))
+            return InputFileGlob(value)
+
+        raise ArgumentTypeError("File %s does not exist for %s" % (
+            value, option_string or self.dest))
+
 
 def append_or_split_with_delimiter_and_extend(dilimiter):
     """Generates a callback function that augments the append action with the
@@ -186,7 +340,7 @@ class ConfigOptionAction(Action):
                 "form 'section.*.key=value'".format(value, option_string))
             raise ArgumentTypeError(msg)
 
-        config_dict = getattr(namespace, self.dest)
+        config_dict = getattr(namespace, self.dest, None)
         if not config_dict:
             config_dict = dict()
             setattr(namespace, self.dest, config_dict)
@@ -231,38 +385,47 @@ class JSONConfigOptionAction(ConfigOptionAction):
             raise ArgumentTypeError(
                 "Invalid json value: {}".format(val))
 
+def load_config_file(filename, recognized_config_keys):
+    """Loads and returns the config dict from a json config file
+
+    The config dict is taken from the first of `recognized_config_keys`
+    found at the top level of the file.
+    """
+    if not os.path.isfile(filename):
+        raise ArgumentTypeError(
+            "File {} does not exist".format(filename))
+
+    with tracing.span('load_config_file', filename=filename), \
+            open(filename) as f:
+        try:
+            file_contents = json.loads(f.read())
+        except ValueError:
+            raise ArgumentTypeError("File {} contains "
+                "invalid config JSON data".format(filename))
+
+    for k in recognized_config_keys:
+        if k in file_contents:
+            # use the first recognized key
+            return file_contents[k]
+
+    raise ArgumentTypeError("Config file must contain a top "
+        "level config key - '{}' ".format(
+            "', '".join(recognized_config_keys)))
+
 def create_config_file_action(recognized_config_keys):
 
     class klass(Action):
         def __call__(self, parser, namespace, value, option_string=None):
             """Load config settings from json file
+
+            The names of the loaded files are recorded, in order, in
+            '<dest>_filenames' so that they can later be watched for
+            changes (see afscripting.configwatcher)
             """
             filename = os.path.abspath(value.strip())
-            if not os.path.isfile(filename):
-                raise ArgumentTypeError(
-                    "File {} does not exist".format(filename))
-
-            with open(filename) as f:
-                try:
-                    file_contents = json.loads(f.read())
-                except ValueError:
-                    raise ArgumentTypeError("File {} contains "
-                        "invalid config JSON data".format(filename))
-
-            config_dict = None
-            for k in recognized_config_keys:
-                if k in file_contents:
-                    config_dict = file_contents[k]
-                    # use the first recognized key
-                    break
+            config_dict = load_config_file(filename, recognized_config_keys)
 
-            if config_dict is None:
-                raise ArgumentTypeError("Config file must contain a top "
-                    "level config key - '{}' ".format(
-                        "', '".join(recognized_config_keys)))
-
-
-            existing_config_dict = getattr(namespace, self.dest)
+            existing_config_dict = getattr(namespace, self.dest, None)
             if not existing_config_dict:
                 # first file loaded
                 setattr(namespace, self.dest, config_dict)
@@ -270,6 +433,10 @@ def create_config_file_action(recognized_config_keys):
                 # subsequent file loaded
                 merge_configs(existing_config_dict, config_dict)
 
+            filenames_dest = '{}_filenames'.format(self.dest)
+            filenames = getattr(namespace, filenames_dest, None) or []
+            setattr(namespace, filenames_dest, filenames + [filename])
+
     return klass
 
 ConfigFileAction = create_config_file_action(['config'])
@@ -301,6 +468,125 @@ def add_arguments(parser, argument_hashes, required=False):
             kwargs.update(required=True)
         parser.add_argument(*opt_strs, **kwargs)
 
+class _LazyHelpArgumentParser(ArgumentParser):
+    """Parser that generates its epilog only when help is formatted, and
+    that optionally caches the formatted help
+    """
+
+    def __init__(self, *args, epilog_generator=None, help_cache_dir=None,
+            help_cache_key_files=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._epilog_generator = epilog_generator
+        self._help_cache_dir = help_cache_dir
+        # files, in addition to the script, whose modification invalidates
+        # the cached help
+        self._help_cache_key_files = [os.path.abspath(f)
+            for f in help_cache_key_files or [] if f]
+
+    def format_help(self):
+        cache_filename = self._help_cache_filename()
+        if cache_filename and os.path.isfile(cache_filename):
+            with open(cache_filename) as f:
+                return f.read()
+
+        if self._epilog_generator:
+            self.epilog = self._epilog_generator()
+            self._epilog_generator = None
+        help_text = super().format_help()
+
+        if cache_filename:
+            # write to temp file and rename, so that concurrent
+            # runs never read partially written help
+            tmp_filename = '{}.{}'.format(cache_filename, os.getpid())
+            try:
+                os.makedirs(self._help_cache_dir, exist_ok=True)
+                with open(tmp_filename, 'w') as f:
+                    f.write(help_text)
+                os.replace(tmp_filename, cache_filename)
+            except OSError as e:
+                logging.debug("Failed to cache help text: %s", e)
+                try:
+                    os.remove(tmp_filename)
+                except OSError:
+                    pass
+
+        return help_text
+
+    def _help_cache_filename(self):
+        if not self._help_cache_dir:
+            return None
+        script = os.path.abspath(sys.argv[0])
+        try:
+            mtimes = [(f, os.path.getmtime(f))
+                for f in [script] + self._help_cache_key_files]
+        except OSError:
+            return None
+        # help text is wrapped to the terminal width
+        key = json.dumps([mtimes, self.prog,
+            shutil.get_terminal_size().columns, __version__])
+        return os.path.join(self._help_cache_dir, '{}-{}.txt'.format(
+            os.path.basename(script),
+            hashlib.sha256(key.encode()).hexdigest()[:16]))
+
+class _LazySubcommandParser(ArgumentParser):
+    """Subcommand parser that imports its module, and adds the module's
+    args, only when it's used
+    """
+
+    def __init__(self, *args, module=None, namespace=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._module_path = module
+        self._module = None
+        self._namespace = namespace
+
+    def _load_module(self):
+        if self._module is None:
+            with tracing.span('parse_args.import_subcommand',
+                    module=self._module_path):
+                self._module = importlib.import_module(self._module_path)
+            add_arguments(self, getattr(self._module, 'REQUIRED_ARGS', []),
+                required=True)
+            add_arguments(self, getattr(self._module, 'OPTIONAL_ARGS', []))
+            add_arguments(self, getattr(self._module, 'POSITIONAL_ARGS', []))
+            self.set_defaults(subcommand_module=self._module)
+
+    def parse_known_args(self, args=None, namespace=None):
+        self._load_module()
+        # argparse parses subcommand args into a new namespace; using the
+        # top level namespace instead lets shared options given after the
+        # subcommand name extend, rather than replace, those given before
+        if namespace is None:
+            namespace = self._namespace
+        return super().parse_known_args(args, namespace)
+
+    def format_help(self):
+        self._load_module()
+        return super().format_help()
+
+def add_subcommands(parser, subcommands, shared_options=None,
+        namespace=None):
+    """Adds lazily imported subcommands to parser; see parse_args
+
+    Kwargs
+     - shared_options -- top level option specs (e.g. LOGGING_OPTIONS)
+        that are also accepted after the subcommand name; they're added
+        without defaults, so that they don't overwrite top level values
+     - namespace -- namespace that will be passed to parser.parse_args;
+        if not specified, shared options given after the subcommand name
+        replace, rather than extend, those given before it
+    """
+    shared_parser = ArgumentParser(add_help=False)
+    add_arguments(shared_parser,
+        [dict(o, default=SUPPRESS) for o in shared_options or []])
+
+    subparsers = parser.add_subparsers(dest='subcommand',
+        metavar='SUBCOMMAND', parser_class=_LazySubcommandParser)
+    subparsers.required = True
+    for s in subcommands:
+        subparsers.add_parser(s['name'], help=s.get('help'),
+            module=s['module'], namespace=namespace,
+            parents=[shared_parser])
+
 def output_args(args, skip=[]):
     for k,v in args.__dict__.items():
         if k not in skip:
@@ -353,39 +639,56 @@ CONFIGURATION_OPTIONS = [
     }
 ]
 
-def add_configuration_options(parser, support_short_names=False):
-    options = copy.copy(CONFIGURATION_OPTIONS)
+def get_configuration_options(support_short_names=False):
+    options = copy.deepcopy(CONFIGURATION_OPTIONS)
     if not support_short_names:
         for o in options:
             o.pop('short')
-    add_arguments(parser, options)
+    return options
+
+def add_configuration_options(parser, support_short_names=False):
+    add_arguments(parser, get_configuration_options(support_short_names))
+    # set by ConfigFileAction; defined even if no config files are loaded
+    parser.set_defaults(config_file_options_filenames=[])
 
 ## Logging Related Options
 
+LOG_FORMATS = ['text', 'json']
+
+LOGGING_OPTIONS = [
+    {
+        'long': "--log-level",
+        'dest': "log_level",
+        'action': LogLevelAction,
+        'default': logging.WARNING,
+        'help': "python log level; default WARNING"
+    },
+    {
+        'long': "--log-file",
+        'dest': "log_file",
+        'action': "store",
+        'default': None,
+        'help': "log file"
+    },
+    {
+        'long': "--log-message-format",
+        'dest': "log_message_format",
+        'action': "store",
+        'default': None,
+        'help': "log message format"
+    },
+    {
+        'long': "--log-format",
+        'dest': "log_format",
+        'action': "store",
+        'choices': LOG_FORMATS,
+        'default': 'text',
+        'help': "'text' (formatted with --log-message-format) or 'json' (one JSON object per line); default text"
+    },
+]
+
 def add_logging_options(parser):
-    add_arguments(parser, [
-        {
-            'long': "--log-level",
-            'dest': "log_level",
-            'action': LogLevelAction,
-            'default': logging.WARNING,
-            'help': "python log level; default WARNING"
-        },
-        {
-            'long': "--log-file",
-            'dest': "log_file",
-            'action': "store",
-            'default': None,
-            'help': "log file"
-        },
-        {
-            'long': "--log-message-format",
-            'dest': "log_message_format",
-            'action': "store",
-            'default': None,
-            'help': "log message format"
-        },
-    ])
+    add_arguments(parser, LOGGING_OPTIONS)
 
 def configure_logging_from_args(args, parser=None):
     """Configures logging from parsed args
@@ -393,11 +696,34 @@ def configure_logging_from_args(args, parser=None):
     Note: `parser` kwarg is left in the signature for backwards
       compatibility. It is not used
     """
+    if getattr(args, 'log_format', 'text') == 'json':
+        handler = (logging.FileHandler(args.log_file) if args.log_file
+            else logging.StreamHandler())
+        handler.setFormatter(JSONFormatter())
+        logging.basicConfig(level=args.log_level, handlers=[handler])
+        return
+
     log_message_format = args.log_message_format or '%(asctime)s %(levelname)s: %(message)s'
 
     logging.basicConfig(format=log_message_format, level=args.log_level,
         filename=args.log_file)
 
+def set_log_level(level, logger=None):
+    """Changes the log level at runtime, e.g. after a config reload
+
+    Arguments:
+     - level -- level name ('DEBUG', 'INFO', etc.) or numeric level
+    Kwargs
+     - logger -- logger to update; defaults to the root logger, which
+        is the one configured by configure_logging_from_args
+    """
+    if isinstance(level, str):
+        log_level = level.strip().upper()
+        if not hasattr(logging, log_level):
+            raise ValueError('Invalid log level: %s' % (log_level))
+        level = getattr(logging, log_level)
+    (logger or logging.getLogger()).setLevel(level)
+
 def configure_tornado_logging_from_args(args):
     """parse_args calls logging.basicConfig. This function configured the
     tornado gen_log separately
@@ -419,8 +745,11 @@ def configure_tornado_logging_from_args(args):
     # formatted) if --log-file *is* set
     logging.getLogger("tornado.general").propagate = False
 
-    formatter = logging.Formatter(args.log_message_format or
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    if getattr(args, 'log_format', 'text') == 'json':
+        formatter = JSONFormatter()
+    else:
+        formatter = logging.Formatter(args.log_message_format or
+            "%(asctime)s - %(name)s - %(levelname)s - %(message)s")
     if args.log_file:
         file_handler = logging.FileHandler(args.log_file)
         file_handler.setFormatter(formatter)
@@ -429,3 +758,177 @@ def configure_tornado_logging_from_args(args):
         stream_handler = logging.StreamHandler()
         stream_handler.setFormatter(formatter)
         tornado.log.gen_log.addHandler(stream_handler)
+
+## Resource Related Options
+
+def parse_cpu_list(value):
+    """Parses cpu list like '0-3,6' into a set of cpu ids
+    """
+    cpus = set()
+    try:
+        for part in value.split(','):
+            if '-' in part:
+                first, last = part.split('-')
+                first, last = int(first), int(last)
+            else:
+                first = last = int(part)
+            # int() accepts e.g. '+1' and ' 1', but ids must not be negative
+            if first < 0 or last < first:
+                raise ValueError(part)
+            cpus.update(range(first, last + 1))
+    except ValueError:
+        cpus = None
+    if not cpus:
+        raise ArgumentTypeError("Invalid cpu list: {}".format(value))
+    return cpus
+
+def parse_positive_int(value):
+    """Parses a positive integer, e.g. for '--workers'
+    """
+    try:
+        n = int(value)
+    except ValueError:
+        n = 0
+    if n < 1:
+        raise ArgumentTypeError("Invalid positive integer: {}".format(value))
+    return n
+
+MEMORY_SIZE_EXTRACTER = re.compile(r'^(\d+(?:\.\d+)?)\s*([kmgt]?)b?$')
+MEMORY_SIZE_MULTIPLIERS = {
+    '': 1,
+    'k': 1024,
+    'm': 1024 ** 2,
+    'g': 1024 ** 3,
+    't': 1024 ** 4
+}
+
+def parse_memory_size(value):
+    """Parses memory size like '512M' or '4G' into number of bytes
+    """
+    m = MEMORY_SIZE_EXTRACTER.search(value.strip().lower())
+    n = m and int(float(m.group(1)) * MEMORY_SIZE_MULTIPLIERS[m.group(2)])
+    if not n:
+        raise ArgumentTypeError("Invalid memory size: {}".format(value))
+    return n
+
+THREAD_COUNT_ENV_VARS = [
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'NUMEXPR_NUM_THREADS'
+]
+
+RESOURCE_OPTIONS = [
+    {
+        'long': "--workers",
+        'dest': "workers",
+        'type': parse_positive_int,
+        'default': None,
+        'help': "number of worker processes; default: available cpus / threads per worker"
+    },
+    {
+        'long': "--threads-per-worker",
+        'dest': "threads_per_worker",
+        'type': parse_positive_int,
+        'default': None,
+        'help': "number of threads per worker, also used for OMP_NUM_THREADS, etc.; default: available cpus / workers, if --workers is set, else 1"
+    },
+    {
+        'long': "--cpu-affinity",
+        'dest': "cpu_affinity",
+        'type': parse_cpu_list,
+        'default': None,
+        'help': "cpus to run on, e.g. '0-3,6'"
+    },
+    {
+        'long': "--max-memory",
+        'dest': "max_memory",
+        'type': parse_memory_size,
+        'default': None,
+        'help': "cap on address space, e.g. '512M', '4G'"
+    },
+    {
+        'long': "--nice",
+        'dest': "nice",
+        'type': int,
+        'default': None,
+        'help': "increment to process niceness"
+    },
+]
+
+def add_resource_options(parser):
+    add_arguments(parser, RESOURCE_OPTIONS)
+
+def configure_resources_from_args(args):
+    """Applies resource options and sets resolved values on args
+
+    After this is called, args.workers and args.threads_per_worker are
+    both set, based on the cpus available to the process, so that process
+    and thread pools can be sized from them. Thread count environment
+    variables read by OpenMP, BLAS, etc. are set to threads_per_worker
+    (without overriding existing values unless --threads-per-worker was
+    specified); they only take effect if set before those libraries are
+    loaded.
+    """
+    if args.cpu_affinity:
+        if hasattr(os, 'sched_setaffinity'):
+            try:
+                os.sched_setaffinity(0, args.cpu_affinity)
+            except OSError as e:
+                # e.g. cpus that don't exist or aren't allowed
+                exit_with_msg("Failed to set --cpu-affinity: {}".format(e))
+        else:
+            logging.warning("CPU affinity not supported on this platform")
+
+    if hasattr(os, 'sched_getaffinity'):
+        available_cpus = len(os.sched_getaffinity(0))
+    else:
+        available_cpus = os.cpu_count() or 1
+
+    threads_per_worker_specified = bool(args.threads_per_worker)
+    if not args.threads_per_worker:
+        args.threads_per_worker = (max(available_cpus // args.workers, 1)
+            if args.workers else 1)
+    if not args.workers:
+        args.workers = max(available_cpus // args.threads_per_worker, 1)
+
+    for v in THREAD_COUNT_ENV_VARS:
+        if threads_per_worker_specified or v not in os.environ:
+            os.environ[v] = str(args.threads_per_worker)
+
+    if args.max_memory:
+        soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY and args.max_memory > hard:
+            exit_with_msg("--max-memory exceeds hard limit of {} "
+                "bytes".format(hard))
+        resource.setrlimit(resource.RLIMIT_AS, (args.max_memory, hard))
+
+    if args.nice:
+        try:
+            os.nice(args.nice)
+        except PermissionError:
+            exit_with_msg("Insufficient privileges for --nice {}".format(
+                args.nice))
+
+## Tracing Related Options
+
+TRACING_OPTIONS = [
+    {
+        'long': "--trace-output",
+        'dest': "trace_output",
+        'action': "store",
+        'default': None,
+        'help': "file to write Chrome trace-event JSON to; tracing is disabled if not specified"
+    },
+]
+
+def add_tracing_options(parser):
+    add_arguments(parser, TRACING_OPTIONS)
+
+def configure_tracing_from_args(args):
+    """Enables tracing if --trace-output was specified; the trace is
+    written at exit (see afscripting.tracing)
+    """
+    if args.trace_output:
+        tracing.enable(args.trace_output)
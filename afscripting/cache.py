@@ -0,0 +1,245 @@
+__author__      = "Joel Dubowy"
+
+import argparse
+import configparser
+import datetime
+import functools
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+from .inputfiles import InputFile, InputFileGlob
+from .timeaxis import TimeAxis
+
+__all__ = [
+    'DEFAULT_EXCLUDED_FIELDS',
+    'fingerprint',
+    'hash_file',
+    'ResultCache'
+]
+
+DEFAULT_EXCLUDED_FIELDS = [
+    # logging
+    'log_level',
+    'log_file',
+    'log_message_format',
+    'log_format',
+    # tracing
+    'trace_output',
+    # resources
+    'workers',
+    'threads_per_worker',
+    'cpu_affinity',
+    'max_memory',
+    'nice',
+    # subcommands; the subcommand's name is in 'subcommand'
+    'subcommand_module',
+    # the config file contents are in 'config_file_options'
+    'config_file_options_filenames'
+]
+"""Namespace fields that don't affect a script's results
+"""
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def hash_file(filename):
+    """Returns the sha256 hex digest of a file's contents
+    """
+    h = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def fingerprint(*values, exclude=DEFAULT_EXCLUDED_FIELDS):
+    """Returns a stable sha256 hex digest of the given values
+
+    Values are typically the parsed args namespace, which includes the
+    merged 'config_options' and 'config_file_options'. Dicts are hashed
+    independently of key order, and InputFile and InputFileGlob values
+    (see InputFileAction) are hashed by path *and* content. Values of
+    types that can't be reliably fingerprinted raise TypeError.
+
+    Kwargs
+     - exclude -- namespace fields to ignore
+    """
+    exclude = set(exclude or [])
+    encoded = json.dumps([_canonicalize(v, exclude) for v in values],
+        sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+def _canonicalize(value, exclude):
+    # Values other than JSON's str, number, bool, null and list are tagged
+    # by type, as {tag: value}, so that, e.g., a datetime and its isoformat
+    # string, or a tuple and a list, hash differently. Dict keys are
+    # prefixed (see _canonicalize_key), so tags can't collide with dicts.
+    if isinstance(value, argparse.Namespace):
+        return {'namespace': {k: _canonicalize(v, exclude)
+            for k, v in vars(value).items() if k not in exclude}}
+    if isinstance(value, configparser.ConfigParser):
+        # e.g. as set by SetConfigOptionAction
+        return {'config_parser': {s: dict(value[s])
+            for s in value.sections()}}
+    if isinstance(value, dict):
+        return {_canonicalize_key(k, exclude): _canonicalize(v, exclude)
+            for k, v in value.items()}
+    if isinstance(value, list):
+        return [_canonicalize(v, exclude) for v in value]
+    if isinstance(value, tuple):
+        return {'tuple': [_canonicalize(v, exclude) for v in value]}
+    if isinstance(value, (set, frozenset)):
+        return {'set': _sorted_canonical(value, exclude)}
+    if isinstance(value, InputFile):
+        return {'input_file': [value.path, hash_file(value.path)]}
+    if isinstance(value, InputFileGlob):
+        return {'input_file_glob': _sorted_canonical(value, exclude)}
+    if isinstance(value, datetime.datetime):
+        return {'datetime': value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {'date': value.isoformat()}
+    if isinstance(value, datetime.timedelta):
+        return {'timedelta': [value.days, value.seconds, value.microseconds]}
+    if isinstance(value, TimeAxis):
+        return {'time_axis': [_canonicalize(value.start, exclude),
+            _canonicalize(value.step, exclude), len(value)]}
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise TypeError("Can't fingerprint value of type {}".format(
+        type(value).__name__))
+
+def _sorted_canonical(values, exclude):
+    return sorted((_canonicalize(v, exclude) for v in values),
+        key=lambda v: json.dumps(v, sort_keys=True))
+
+def _canonicalize_key(key, exclude):
+    # keys are prefixed by type so that, e.g., 1 and '1' hash differently
+    if isinstance(key, str):
+        return 's:' + key
+    return 'j:' + json.dumps(_canonicalize(key, exclude), sort_keys=True)
+
+class ResultCache(object):
+    """Local content-addressed cache of results, keyed by fingerprint
+
+    Usage:
+
+        cache = ResultCache('~/.cache/my-script', max_size=10 * 1024**3)
+
+        @cache.memoize
+        def run(args):
+            ...
+
+        result = run(args)
+
+    Entries are written to a temporary file and then renamed into place,
+    so concurrent runs never see partially written entries. Reading an
+    entry updates its mtime, and, if max_size is set, the least recently
+    used entries are evicted whenever the cache grows beyond it.
+    """
+
+    TMP_PREFIX = '.tmp-'
+
+    def __init__(self, directory, max_size=None):
+        """Constructor
+
+        Arguments:
+         - directory -- cache directory; created if it doesn't exist
+        Kwargs
+         - max_size -- max total size of entries, in bytes
+        """
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        self.max_size = max_size
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def __contains__(self, key):
+        return os.path.isfile(self._path(key))
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return default
+        except (pickle.UnpicklingError, EOFError):
+            # shouldn't happen, given atomic writes, but e.g. disk errors
+            self._remove(path)
+            return default
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # evicted by a concurrent run
+            pass
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=self.TMP_PREFIX,
+            dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        if self.max_size is not None:
+            self.evict()
+
+    def memoize(self, func=None, exclude=DEFAULT_EXCLUDED_FIELDS):
+        """Decorator that caches func's return value, keyed by the
+        fingerprint of func's name and arguments
+
+        May be used as @cache.memoize or @cache.memoize(exclude=[...])
+        """
+        if func is None:
+            return functools.partial(self.memoize, exclude=exclude)
+
+        name = '{}.{}'.format(func.__module__, func.__qualname__)
+        _miss = object()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = fingerprint(name, args, kwargs, exclude=exclude)
+            value = self.get(key, _miss)
+            if value is _miss:
+                value = func(*args, **kwargs)
+                self.put(key, value)
+            return value
+        return wrapper
+
+    def evict(self):
+        """Removes least recently used entries until the total size of
+        the cache is no greater than max_size
+        """
+        entries = []
+        total_size = 0
+        for subdir in os.scandir(self.directory):
+            if not subdir.is_dir():
+                continue
+            for entry in os.scandir(subdir.path):
+                if entry.name.startswith(self.TMP_PREFIX):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total_size += st.st_size
+
+        for mtime, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            self._remove(path)
+            total_size -= size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,211 @@
+__author__      = "Joel Dubowy"
+
+import copy
+import logging
+import os
+import threading
+from argparse import ArgumentTypeError
+
+from afconfig import merge_configs
+
+from .args import load_config_file, set_log_level
+
+__all__ = [
+    'ConfigFileWatcher',
+    'diff_config_paths'
+]
+
+class ConfigFileWatcher(object):
+    """Watches the files passed to --config-file and reloads them on change
+
+    Usage:
+
+        watcher = ConfigFileWatcher(args.config_file_options_filenames,
+            overrides=args.config_options, log_level_key=('log_level',),
+            io_loop=tornado.ioloop.IOLoop.current())
+        watcher.add_callback(lambda config, changed_paths: ...)
+        watcher.start()
+        ...
+        config = watcher.config
+
+    parse_args defines args.config_file_options_filenames even if no
+    config files were specified. For parsers that use ConfigFileAction
+    directly, use getattr(args, 'config_file_options_filenames', [])
+
+    Files are polled in a daemon thread, so that neither reading nor
+    parsing ever runs on the caller's (e.g. tornado's) IOLoop. Only files
+    whose stat signature (mtime, size, inode) changed are re-parsed; the
+    merged config is then rebuilt from the cached per-file configs.
+
+    Each reload publishes a brand new config dict by swapping a single
+    reference, so readers of `config` see either the old or the new config,
+    never a partially merged one. Published configs must be treated as
+    read-only.
+
+    A file that is missing or contains invalid config data is logged and
+    skipped, leaving the last good config in place.
+    """
+
+    def __init__(self, filenames, recognized_config_keys=['config'],
+            overrides=None, interval=1.0, log_level_key=None, io_loop=None):
+        """Constructor
+
+        Arguments:
+         - filenames -- config files, in the order they were loaded
+        Kwargs
+         - recognized_config_keys -- as passed to create_config_file_action
+         - overrides -- config dict merged on top of the files' config,
+            e.g. args.config_options
+         - interval -- polling interval, in seconds
+         - log_level_key -- keys of the log level in the merged config,
+            e.g. ('logging', 'level'); if specified, the root log level
+            is updated whenever that value changes
+         - io_loop -- if specified, callbacks are scheduled on this
+            tornado IOLoop (via the thread-safe add_callback) instead of
+            being called from the watcher thread
+        """
+        self._filenames = [os.path.abspath(f) for f in filenames or []]
+        self._recognized_config_keys = recognized_config_keys
+        self._overrides = overrides
+        self._interval = interval
+        self._log_level_key = log_level_key
+        self._io_loop = io_loop
+
+        self._callbacks = []
+        self._signatures = {}
+        self._file_configs = {}
+        for filename in self._filenames:
+            self._signatures[filename] = self._stat(filename)
+            self._file_configs[filename] = load_config_file(
+                filename, self._recognized_config_keys)
+        self._config = self._merge()
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def config(self):
+        return self._config
+
+    def add_callback(self, callback):
+        """Registers callback to be called, after each reload, as
+        callback(config, changed_paths), where changed_paths is a list of
+        key tuples whose values were added, removed, or modified
+        """
+        self._callbacks.append(callback)
+
+    def start(self):
+        if not self._thread:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run,
+                name='ConfigFileWatcher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+
+    def check(self):
+        """Checks the files once, reloading if any have changed
+
+        Returns the list of changed config paths (empty if nothing changed)
+        """
+        with self._lock:
+            reloaded = False
+            for filename in self._filenames:
+                signature = self._stat(filename)
+                if signature is None or signature == self._signatures[filename]:
+                    continue
+                try:
+                    file_config = load_config_file(filename,
+                        self._recognized_config_keys)
+                except ArgumentTypeError as e:
+                    logging.error("Failed to reload config file: %s", e)
+                    continue
+                self._signatures[filename] = signature
+                self._file_configs[filename] = file_config
+                reloaded = True
+
+            if not reloaded:
+                return []
+
+            old_config = self._config
+            new_config = self._merge()
+            changed_paths = diff_config_paths(old_config, new_config)
+            if not changed_paths:
+                return []
+
+            self._config = new_config
+            logging.info("Reloaded config; changed: %s", ', '.join(
+                '.'.join(str(k) for k in p) for p in changed_paths))
+
+        # compare resolved values, since diff_config_paths reports added
+        # or removed sections at the section's path
+        if self._log_level_key:
+            level = self._get_log_level(new_config)
+            if level != self._get_log_level(old_config):
+                self._update_log_level(level)
+
+        for callback in self._callbacks:
+            if self._io_loop:
+                self._io_loop.add_callback(callback, new_config, changed_paths)
+            else:
+                callback(new_config, changed_paths)
+
+        return changed_paths
+
+    ## Helpers
+
+    def _run(self):
+        while not self._stop_event.wait(self._interval):
+            try:
+                self.check()
+            except Exception as e:
+                logging.error("Config file watcher error: %s", e)
+
+    def _stat(self, filename):
+        try:
+            st = os.stat(filename)
+        except OSError:
+            # e.g. file being replaced by an editor; check again next time
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _merge(self):
+        config = {}
+        for filename in self._filenames:
+            merge_configs(config, copy.deepcopy(self._file_configs[filename]))
+        if self._overrides:
+            merge_configs(config, copy.deepcopy(self._overrides))
+        return config
+
+    def _get_log_level(self, config):
+        level = config
+        for k in self._log_level_key:
+            level = level.get(k) if isinstance(level, dict) else None
+        return level
+
+    def _update_log_level(self, level):
+        if level is not None:
+            try:
+                set_log_level(level)
+            except ValueError as e:
+                logging.error("Failed to update log level: %s", e)
+
+def diff_config_paths(old, new, path=()):
+    """Returns the list of key tuples whose values differ between the
+    two config dicts, recursing into nested dicts
+    """
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return [] if old == new else [path]
+
+    changed_paths = []
+    for k in sorted(set(old) | set(new), key=str):
+        if k not in old or k not in new:
+            changed_paths.append(path + (k,))
+        else:
+            changed_paths.extend(diff_config_paths(old[k], new[k], path + (k,)))
+    return changed_paths
@@ -0,0 +1,240 @@
+__author__      = "Joel Dubowy"
+
+import bz2
+import glob
+import gzip
+import io
+import lzma
+import mmap
+import os
+import queue
+import threading
+
+__all__ = [
+    'InputFile',
+    'InputFileGlob',
+    'iter_input_files'
+]
+
+DECOMPRESSORS = {
+    '.gz': gzip.open,
+    '.bz2': bz2.open,
+    '.xz': lzma.open
+}
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_READ_AHEAD = 4
+
+class InputFile(object):
+    """Input file path that is opened lazily
+
+    Plain files are memory-mapped rather than read into memory, and
+    .gz/.bz2/.xz files are decompressed in a background thread that reads
+    ahead a bounded number of chunks, so that decompression overlaps with
+    the caller's processing without holding the whole file in memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def __fspath__(self):
+        return self.path
+
+    def __str__(self):
+        return self.path
+
+    def __repr__(self):
+        return "InputFile({!r})".format(self.path)
+
+    def __eq__(self, other):
+        return isinstance(other, InputFile) and self.path == other.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+    @property
+    def compressed(self):
+        return os.path.splitext(self.path)[1].lower() in DECOMPRESSORS
+
+    def open(self, mode='rb', encoding=None, chunk_size=DEFAULT_CHUNK_SIZE,
+            read_ahead=DEFAULT_READ_AHEAD):
+        """Opens the file for reading
+
+        Kwargs
+         - mode -- 'rb' (default), or 'r'/'rt' for text
+         - encoding -- text encoding, for text mode
+         - chunk_size -- size of decompressed chunks, in bytes
+         - read_ahead -- max number of decompressed chunks buffered ahead
+            of the reader
+        """
+        if mode not in ('r', 'rt', 'rb'):
+            raise ValueError("Invalid mode for input file: '{}'".format(mode))
+
+        ext = os.path.splitext(self.path)[1].lower()
+        if ext in DECOMPRESSORS:
+            raw = _ThreadedReader(DECOMPRESSORS[ext](self.path, 'rb'),
+                chunk_size, read_ahead)
+            f = io.BufferedReader(raw, buffer_size=chunk_size)
+        elif os.path.getsize(self.path) > 0:
+            f = io.BufferedReader(_MmapReader(self.path))
+        else:
+            # empty files can't be memory-mapped
+            f = open(self.path, 'rb')
+
+        if mode != 'rb':
+            f = io.TextIOWrapper(f, encoding=encoding)
+        return f
+
+    def mmap(self):
+        """Returns a read-only memory map of a plain (uncompressed) file,
+        e.g. for zero-copy use with numpy.frombuffer
+        """
+        if self.compressed:
+            raise ValueError("Can't memory-map compressed file {}".format(
+                self.path))
+        with open(self.path, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class InputFileGlob(object):
+    """Glob pattern whose matching InputFile objects are generated lazily
+
+    '**' matches any files and zero or more directories
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+
+    def __repr__(self):
+        return "InputFileGlob({!r})".format(self.pattern)
+
+    def __iter__(self):
+        for path in glob.iglob(self.pattern, recursive=True):
+            if os.path.isfile(path):
+                yield InputFile(path)
+
+
+def iter_input_files(values):
+    """Generates InputFile objects from a mix of InputFile and InputFileGlob
+    values, e.g. from an option using InputFileAction with nargs
+    """
+    if isinstance(values, (InputFile, InputFileGlob)):
+        values = [values]
+    for v in values or []:
+        if isinstance(v, InputFileGlob):
+            yield from v
+        else:
+            yield v
+
+
+##
+## Helpers
+##
+
+class _MmapReader(io.RawIOBase):
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        n = min(len(b), len(self._mmap) - self._pos)
+        if n <= 0:
+            return 0
+        b[:n] = self._mmap[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._mmap)
+        self._pos = max(offset, 0)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def close(self):
+        if not self.closed:
+            self._mmap.close()
+        super().close()
+
+
+class _ThreadedReader(io.RawIOBase):
+
+    _EOF = object()
+
+    def __init__(self, f, chunk_size, read_ahead):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._queue = queue.Queue(maxsize=max(read_ahead, 1))
+        self._stop_event = threading.Event()
+        self._buffer = b''
+        self._offset = 0
+        self._done = False
+        self._thread = threading.Thread(target=self._run,
+            name='InputFileReader', daemon=True)
+        self._thread.start()
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while self._offset >= len(self._buffer):
+            if self._done:
+                return 0
+            chunk = self._queue.get()
+            if chunk is self._EOF:
+                self._done = True
+                return 0
+            if isinstance(chunk, Exception):
+                self._done = True
+                raise chunk
+            self._buffer = chunk
+            self._offset = 0
+
+        n = min(len(b), len(self._buffer) - self._offset)
+        b[:n] = self._buffer[self._offset:self._offset + n]
+        self._offset += n
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._stop_event.set()
+            # drain the queue so that the reader thread isn't left blocked
+            # on a full queue
+            while self._thread.is_alive():
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    self._thread.join(0.01)
+            self._f.close()
+        super().close()
+
+    def _run(self):
+        try:
+            while not self._stop_event.is_set():
+                chunk = self._f.read(self._chunk_size)
+                if not chunk:
+                    break
+                self._put(chunk)
+            self._put(self._EOF)
+        except Exception as e:
+            self._put(e)
+
+    def _put(self, item):
+        while not self._stop_event.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
@@ -0,0 +1,75 @@
+__author__      = "Joel Dubowy"
+
+import json
+import logging
+import time
+
+__all__ = [
+    'JSONFormatter'
+]
+
+# Use the fastest json encoder available. Neither orjson nor ujson are
+# included in project dependencies
+try:
+    import orjson
+    def _dumps(d):
+        return orjson.dumps(d, default=str).decode()
+except ImportError:
+    try:
+        import ujson
+        def _dumps(d):
+            return ujson.dumps(d, ensure_ascii=False)
+    except ImportError:
+        # json.dumps builds a new encoder for each call when passed
+        # any non-default options, so create one up front
+        _dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'),
+            default=str).encode
+
+class JSONFormatter(logging.Formatter):
+    """Formats each log record as a single line JSON object, e.g.
+
+        {"time":"2015-08-05T15:02:43.123","level":"INFO","name":"root","message":"..."}
+
+    Static fields are encoded once, at construction, and the timestamp
+    string is only recomputed when the record's second changes.
+    """
+
+    def __init__(self, static_fields=None):
+        """Constructor
+
+        Kwargs
+         - static_fields -- dict of fields included in every record,
+            e.g. {"service": "my-service"}
+        """
+        super().__init__()
+        if static_fields:
+            self._prefix = _dumps(static_fields)[:-1] + ','
+        else:
+            self._prefix = '{'
+        self._time_cache = (None, None)
+
+    def formatTime(self, record, datefmt=None):
+        secs = int(record.created)
+        cached_secs, cached_time = self._time_cache
+        if secs != cached_secs:
+            cached_time = time.strftime('%Y-%m-%dT%H:%M:%S',
+                self.converter(secs))
+            # single assignment, so concurrent readers see a consistent pair
+            self._time_cache = (secs, cached_time)
+        return '%s.%03d' % (cached_time, record.msecs)
+
+    def format(self, record):
+        d = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'name': record.name,
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            d['exc_info'] = record.exc_text
+        if record.stack_info:
+            d['stack_info'] = self.formatStack(record.stack_info)
+        return self._prefix + _dumps(d)[1:]
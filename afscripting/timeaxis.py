@@ -0,0 +1,121 @@
+__author__      = "Joel Dubowy"
+
+import datetime
+import re
+
+__all__ = [
+    'TimeAxis',
+    'parse_timedelta'
+]
+
+class TimeAxis(object):
+    """Lazy, evenly spaced sequence of datetimes from start to end, inclusive
+
+    Only the start, step and number of steps are stored, so memory use is
+    constant regardless of the length of the axis. Datetime objects are
+    created only when indexed or iterated; slicing returns another
+    TimeAxis, and to_numpy builds a datetime64 array directly, without
+    creating any per-step datetime objects.
+
+    Timezone aware start and end datetimes are converted to UTC, so that
+    steps are always of real elapsed time, including across DST
+    transitions, and so that indexing, iteration and to_numpy agree.
+    """
+
+    def __init__(self, start, end, step=datetime.timedelta(hours=1)):
+        if not step:
+            raise ValueError("Time axis step must be non-zero")
+        # Python does wall-clock arithmetic on aware datetimes that share
+        # a tzinfo, which is off by the DST offset change
+        if start.tzinfo is not None:
+            start = start.astimezone(datetime.timezone.utc)
+        if end.tzinfo is not None:
+            end = end.astimezone(datetime.timezone.utc)
+        self._start = start
+        self._step = step
+        n = (end - start) // step + 1
+        self._indices = range(max(n, 0))
+
+    @classmethod
+    def _from_range(cls, start, step, indices):
+        time_axis = cls.__new__(cls)
+        time_axis._start = start + indices.start * step
+        time_axis._step = step * indices.step
+        time_axis._indices = range(len(indices))
+        return time_axis
+
+    @property
+    def start(self):
+        return self._start
+
+    @property
+    def end(self):
+        if not self._indices:
+            return None
+        return self._start + self._indices[-1] * self._step
+
+    @property
+    def step(self):
+        return self._step
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __iter__(self):
+        dt = self._start
+        for _ in self._indices:
+            yield dt
+            dt += self._step
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self._from_range(self._start, self._step,
+                self._indices[key])
+        return self._start + self._indices[key] * self._step
+
+    def __eq__(self, other):
+        if not isinstance(other, TimeAxis):
+            return NotImplemented
+        return (len(self) == len(other) and (not self._indices or
+            (self._start == other._start and self._step == other._step)))
+
+    def __repr__(self):
+        return "TimeAxis(start={}, end={}, step={}, length={})".format(
+            self.start, self.end, self.step, len(self))
+
+    def to_numpy(self, unit='us'):
+        """Returns the axis as a numpy datetime64 array
+
+        Timezone aware datetimes are converted to (naive) UTC, since
+        numpy's datetime64 doesn't support timezones.
+        """
+        # Import numpy inline and don't include in project dependencies;
+        # If a project calls this method, it will have already installed it
+        import numpy
+
+        start = self._start
+        if start.tzinfo is not None:
+            start = start.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        offsets = numpy.arange(len(self), dtype='int64') * numpy.timedelta64(
+            self._step, 'us')
+        return (numpy.datetime64(start, 'us') + offsets).astype(
+            'datetime64[{}]'.format(unit))
+
+
+TIMEDELTA_EXTRACTER = re.compile(r'^(\d+)?\s*(d|h|m|min|s)$')
+TIMEDELTA_UNITS = {
+    'd': 'days',
+    'h': 'hours',
+    'm': 'minutes',
+    'min': 'minutes',
+    's': 'seconds'
+}
+
+def parse_timedelta(value):
+    """Parses strings like '1h', '15m', '1d', or 'h' into a timedelta
+    """
+    m = TIMEDELTA_EXTRACTER.search(value.strip().lower())
+    if not m:
+        raise ValueError("Invalid time step '{}'".format(value))
+    n = int(m.group(1) or 1)
+    return datetime.timedelta(**{TIMEDELTA_UNITS[m.group(2)]: n})
@@ -0,0 +1,195 @@
+__author__      = "Joel Dubowy"
+
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+__all__ = [
+    'enable',
+    'disable',
+    'is_enabled',
+    'span',
+    'traced',
+    'write'
+]
+
+_enabled = False
+_output_file = None
+_start_ns = None
+_pid = None
+_events = []
+_multiprocessing_hook_registered = False
+
+def enable(output_file=None):
+    """Starts recording spans
+
+    Kwargs
+     - output_file -- if specified, the trace is written to this file
+        at exit
+    """
+    global _enabled, _output_file, _start_ns, _pid
+    if not _enabled:
+        _start_ns = time.perf_counter_ns()
+        _pid = os.getpid()
+        if output_file and not _output_file:
+            atexit.register(write)
+            _register_multiprocessing_hook()
+        _output_file = output_file or _output_file
+        _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+def _clear_after_fork():
+    # A forked child inherits the parent's spans; clear them so that the
+    # child's trace only contains its own
+    global _start_ns
+    del _events[:]
+    if _start_ns is not None:
+        _start_ns = time.perf_counter_ns()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_clear_after_fork)
+
+def _register_multiprocessing_hook():
+    # multiprocessing children, e.g. pool workers, exit via os._exit
+    # without running the parent's atexit handlers, so have each child
+    # write its trace from a multiprocessing finalizer instead, which
+    # is run when the child exits normally. Finalizers are cleared when
+    # a child starts, so the finalizer is registered from an after-fork
+    # hook (which is inherited by grandchildren as well).
+    global _multiprocessing_hook_registered
+    if not _multiprocessing_hook_registered:
+        # Import inline, to avoid the cost for scripts that don't trace
+        import multiprocessing.util
+        multiprocessing.util.register_after_fork(write,
+            _register_multiprocessing_finalizer)
+        _multiprocessing_hook_registered = True
+
+def _register_multiprocessing_finalizer(func):
+    import multiprocessing.util
+    multiprocessing.util.Finalize(None, func, exitpriority=0)
+
+class _Span(object):
+
+    __slots__ = ('name', 'args', 'start_ns')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # list.append is atomic, so no lock is needed across threads
+        _events.append((self.name, self.start_ns, time.perf_counter_ns(),
+            threading.get_ident(), threading.current_thread().name,
+            self.args))
+        return False
+
+class _NullSpan(object):
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def span(name, **args):
+    """Returns a context manager that records a span while tracing is
+    enabled, or a shared no-op context manager otherwise
+
+    Usage:
+
+        with span('load_fires', filename=filename):
+            ...
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+def traced(name=None, **args):
+    """Decorator that records a span for each call while tracing is enabled
+
+    Whether tracing is enabled is checked at call time, so functions can be
+    decorated at import time, before parse_args has enabled tracing.
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+        @functools.wraps(func)
+        def wrapper(*func_args, **func_kwargs):
+            if not _enabled:
+                return func(*func_args, **func_kwargs)
+            with _Span(span_name, args):
+                return func(*func_args, **func_kwargs)
+        return wrapper
+    return decorator
+
+def write(output_file=None):
+    """Writes the recorded spans as Chrome trace-event JSON, which can be
+    loaded in chrome://tracing or https://ui.perfetto.dev
+
+    A span covering the whole run, from when tracing was enabled, is added.
+    If called in a forked child process, the default output file name is
+    suffixed with the child's pid, so that each process writes its own file.
+
+    This is called automatically at exit, including in forked
+    multiprocessing children that exit normally (e.g. pool workers after
+    Pool.close and Pool.join). Children that are terminated (e.g. by
+    Pool.terminate, or by exiting the Pool's context manager) should call
+    it themselves, e.g. at the end of each task.
+
+    Kwargs
+     - output_file -- defaults to the file passed to enable
+    """
+    pid = os.getpid()
+    output_file = output_file or _output_file
+    if not output_file or _start_ns is None:
+        return
+    if pid != _pid and output_file == _output_file:
+        output_file = '{}.{}'.format(output_file, pid)
+
+    events = [
+        {
+            'name': 'process_name', 'ph': 'M', 'pid': pid,
+            'args': {'name': ' '.join(sys.argv)}
+        },
+        {
+            'name': 'run', 'ph': 'X', 'pid': pid,
+            'tid': threading.main_thread().ident,
+            'ts': _start_ns / 1000,
+            'dur': (time.perf_counter_ns() - _start_ns) / 1000
+        }
+    ]
+    thread_names = {threading.main_thread().ident:
+        threading.main_thread().name}
+    for name, start_ns, end_ns, tid, thread_name, args in list(_events):
+        thread_names[tid] = thread_name
+        event = {
+            'name': name, 'ph': 'X', 'pid': pid, 'tid': tid,
+            'ts': start_ns / 1000, 'dur': (end_ns - start_ns) / 1000
+        }
+        if args:
+            event['args'] = args
+        events.append(event)
+    for tid, thread_name in thread_names.items():
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid,
+            'tid': tid, 'args': {'name': thread_name}})
+
+    with open(output_file, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f,
+            default=str)
@@ -0,0 +1,91 @@
+"""Benchmarks reading input files via afscripting.inputfiles.InputFile
+against reading them whole, reporting throughput and peak memory
+
+Usage:
+
+    python test/benchmark/bench_inputfiles.py [--size-gb 2] [--dir /tmp]
+
+Each read is run in a separate process, so that peak RSS is measured
+independently. Use --skip-whole-file if the input doesn't fit in memory.
+
+Note that peak RSS for memory-mapped plain files includes the mapped
+file pages, which are shared with the page cache and reclaimable, rather
+than memory allocated by the process.
+"""
+
+__author__ = "Joel Dubowy"
+
+import argparse
+import gzip
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# put the repo root dir at the front of sys.path, as in test/conftest.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+
+from afscripting.inputfiles import InputFile
+
+BLOCK = b''.join(
+    b'%d,%d,%d,2015-08-05T15:00:00,some text field\n' % (i, i * 2, i * 3)
+    for i in range(100000))
+
+def generate(path, size):
+    opener = (lambda p: gzip.open(p, 'wb', compresslevel=1)
+        if path.endswith('.gz') else open(p, 'wb'))
+    written = 0
+    with opener(path) as f:
+        while written < size:
+            f.write(BLOCK)
+            written += len(BLOCK)
+
+def read(mode, path):
+    n = 0
+    t = time.perf_counter()
+    if mode == 'inputfile':
+        with InputFile(path).open('rb') as f:
+            for line in f:
+                n += len(line)
+    else:
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rb') as f:
+            for line in f.read().splitlines(True):
+                n += len(line)
+    elapsed = time.perf_counter() - t
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    max_rss_mb = max_rss / (1024 ** 2 if sys.platform == 'darwin' else 1024)
+    print('{:>10} {:>12} {:>10.0f} MB/s {:>10.0f} MB peak RSS'.format(mode,
+        os.path.basename(path), n / elapsed / 1e6, max_rss_mb))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size-gb', type=float, default=2,
+        help="uncompressed input size; default 2")
+    parser.add_argument('--dir', default=None,
+        help="where to write the generated inputs; default tmp dir")
+    parser.add_argument('--skip-whole-file', action='store_true',
+        help="don't benchmark reading whole files into memory")
+    parser.add_argument('--read', nargs=2, metavar=('MODE', 'PATH'),
+        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.read:
+        read(*args.read)
+        return
+
+    modes = ['inputfile'] if args.skip_whole_file else ['whole-file', 'inputfile']
+    with tempfile.TemporaryDirectory(dir=args.dir) as d:
+        for name in ('input.csv', 'input.csv.gz'):
+            path = os.path.join(d, name)
+            generate(path, int(args.size_gb * 1024 ** 3))
+            for mode in modes:
+                subprocess.run([sys.executable, __file__, '--read', mode, path],
+                    check=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Benchmarks afscripting.jsonlog.JSONFormatter against the default text
+log format used by configure_logging_from_args, in records/sec
+
+Usage:
+
+    python test/benchmark/bench_jsonlog.py [--records 200000] [--repeat 5]
+
+JSONFormatter uses orjson or ujson if installed, else the stdlib json
+module; run with each installed to compare encoders.
+"""
+
+__author__ = "Joel Dubowy"
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+# put the repo root dir at the front of sys.path, as in test/conftest.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+
+from afscripting.jsonlog import JSONFormatter
+
+def json_encoder_name():
+    for name in ('orjson', 'ujson'):
+        try:
+            __import__(name)
+            return name
+        except ImportError:
+            pass
+    return 'json'
+
+def bench(formatter, records):
+    with open(os.devnull, 'w') as f:
+        handler = logging.StreamHandler(f)
+        handler.setFormatter(formatter)
+        logger = logging.getLogger('bench.{}'.format(id(formatter)))
+        logger.propagate = False
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        t = time.perf_counter()
+        for i in range(records):
+            logger.info("processed fire %s with %d locations", 'abc', i)
+        elapsed = time.perf_counter() - t
+        logger.removeHandler(handler)
+    return records / elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5,
+        help="number of runs per formatter; the best is reported")
+    args = parser.parse_args()
+
+    formatters = [
+        ('text', lambda: logging.Formatter(
+            '%(asctime)s %(levelname)s: %(message)s')),
+        ('json ({})'.format(json_encoder_name()), JSONFormatter)
+    ]
+    for name, formatter_class in formatters:
+        rate = max(bench(formatter_class(), args.records)
+            for _ in range(args.repeat))
+        print('{:>16} {:>10.0f} records/sec'.format(name, rate))
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,8 @@
 __author__ = "Joel Dubowy"
 
 import argparse
+import logging
+import os
 import tempfile
 
 from pytest import raises
@@ -132,3 +134,312 @@ class TestCreateConfigFileAction(object):
                     "bar": "sdfsdf",
                     "baz": 123123
                 }
+
+    def test_records_filenames(self):
+        with tempfile.NamedTemporaryFile('w+t') as f1:
+            with tempfile.NamedTemporaryFile('w+t') as f2:
+                f1.write('{"config": {"Foo": "bar"}}')
+                f1.flush()
+                f2.write('{"config": {"bar": "baz"}}')
+                f2.flush()
+                p = self.add_option_and_parse([f1.name, f2.name])
+                assert p.config_file_options_filenames == [f1.name, f2.name]
+
+class TestInputFileAction(object):
+
+    def parse(self, args):
+        options = [{
+            "flags": ['-i', '--input-file'],
+            "kwargs": {
+                'dest': 'input_files',
+                'nargs': '+',
+                'action': afscripting.args.InputFileAction
+            }
+        }]
+        return parse_args(args, options)
+
+    def test_files_and_globs(self):
+        with tempfile.TemporaryDirectory() as d:
+            for name in ('a.csv', 'b.csv'):
+                open(os.path.join(d, name), 'w').close()
+            p = self.parse(['-i', os.path.join(d, 'a.csv'),
+                os.path.join(d, '*.csv')])
+            assert p.input_files[0] == afscripting.inputfiles.InputFile(
+                os.path.join(d, 'a.csv'))
+            assert isinstance(p.input_files[1],
+                afscripting.inputfiles.InputFileGlob)
+            assert len(list(afscripting.inputfiles.iter_input_files(
+                p.input_files))) == 3
+
+    def test_literal_path_with_glob_characters(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'data[1].csv')
+            open(path, 'w').close()
+            p = self.parse(['-i', path])
+            assert p.input_files == [afscripting.inputfiles.InputFile(path)]
+
+    def test_recursive_glob(self):
+        with tempfile.TemporaryDirectory() as d:
+            os.makedirs(os.path.join(d, 'a', 'b'))
+            open(os.path.join(d, 'a', 'b', 'c.csv'), 'w').close()
+            p = self.parse(['-i', os.path.join(d, '**', '*.csv')])
+            assert [f.path for f in afscripting.inputfiles.iter_input_files(
+                p.input_files)] == [os.path.join(d, 'a', 'b', 'c.csv')]
+
+    def test_missing(self):
+        with tempfile.TemporaryDirectory() as d:
+            with raises(argparse.ArgumentTypeError):
+                self.parse(['-i', os.path.join(d, 'a.csv')])
+            with raises(argparse.ArgumentTypeError):
+                self.parse(['-i', os.path.join(d, '*.csv')])
+
+class TestResourceOptions(object):
+
+    def parse(self, args):
+        parser = argparse.ArgumentParser()
+        afscripting.args.add_resource_options(parser)
+        return parser.parse_args(args)
+
+    def test_parse_cpu_list(self):
+        assert afscripting.args.parse_cpu_list('0-3,6') == {0, 1, 2, 3, 6}
+        for v in ('0-a', '3-1', '-1', '1--2', '', ','):
+            with raises(argparse.ArgumentTypeError):
+                afscripting.args.parse_cpu_list(v)
+
+    def test_invalid_cpu_affinity(self, monkeypatch):
+        def sched_setaffinity(pid, cpus):
+            raise OSError(22, 'Invalid argument')
+        monkeypatch.setattr(os, 'sched_setaffinity', sched_setaffinity,
+            raising=False)
+        with raises(SystemExit):
+            afscripting.args.configure_resources_from_args(
+                self.parse(['--cpu-affinity', '1000']))
+
+    def test_positive_worker_counts(self):
+        assert self.parse(['--workers', '2']).workers == 2
+        for v in ('0', '-2', 'a'):
+            with raises(SystemExit):
+                self.parse(['--workers', v])
+            with raises(SystemExit):
+                self.parse(['--threads-per-worker', v])
+
+    def test_nice_without_privileges(self, monkeypatch):
+        def nice(increment):
+            raise PermissionError()
+        monkeypatch.setattr(os, 'nice', nice)
+        for v in afscripting.args.THREAD_COUNT_ENV_VARS:
+            monkeypatch.setenv(v, '1')
+        with raises(SystemExit):
+            afscripting.args.configure_resources_from_args(
+                self.parse(['--nice', '-5']))
+
+    def test_parse_memory_size(self):
+        assert afscripting.args.parse_memory_size('512') == 512
+        assert afscripting.args.parse_memory_size('2k') == 2048
+        assert afscripting.args.parse_memory_size('1.5G') == 1610612736
+        with raises(argparse.ArgumentTypeError):
+            afscripting.args.parse_memory_size('4X')
+        for v in ('0', '0G'):
+            with raises(argparse.ArgumentTypeError):
+                afscripting.args.parse_memory_size(v)
+
+    def test_resolves_workers_and_threads(self, monkeypatch):
+        monkeypatch.setattr(os, 'sched_getaffinity', lambda pid: set(range(8)),
+            raising=False)
+        for v in afscripting.args.THREAD_COUNT_ENV_VARS:
+            # setting first ensures the original state is restored
+            monkeypatch.setenv(v, '')
+            monkeypatch.delenv(v)
+
+        args = self.parse([])
+        afscripting.args.configure_resources_from_args(args)
+        assert (args.workers, args.threads_per_worker) == (8, 1)
+
+        args = self.parse(['--workers', '2'])
+        afscripting.args.configure_resources_from_args(args)
+        assert (args.workers, args.threads_per_worker) == (2, 4)
+        # not overridden, since --threads-per-worker wasn't specified
+        assert os.environ['OMP_NUM_THREADS'] == '1'
+
+        args = self.parse(['--threads-per-worker', '2'])
+        afscripting.args.configure_resources_from_args(args)
+        assert (args.workers, args.threads_per_worker) == (4, 2)
+        assert os.environ['OMP_NUM_THREADS'] == '2'
+
+class TestSubcommands(object):
+
+    SUBCOMMANDS = [
+        {'name': 'foo', 'module': 'afscripting_test_foo', 'help': 'foo'},
+        # would fail if imported
+        {'name': 'bar', 'module': 'afscripting_test_nonexistent.bar'}
+    ]
+
+    def test_only_chosen_subcommand_imported(self, tmp_path, monkeypatch):
+        (tmp_path / 'afscripting_test_foo.py').write_text(
+            "REQUIRED_ARGS = [{'long': '--x', 'dest': 'x', 'type': int}]\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.setattr('sys.argv', ['tool', '--log-level', 'INFO',
+            'foo', '--x', '3'])
+
+        parser, args = afscripting.args.parse_args([], [],
+            subcommands=self.SUBCOMMANDS)
+        assert args.subcommand == 'foo'
+        assert args.subcommand_module.__name__ == 'afscripting_test_foo'
+        assert args.x == 3
+        assert args.log_level == logging.INFO
+
+    def test_shared_options_after_subcommand(self, tmp_path, monkeypatch):
+        (tmp_path / 'afscripting_test_foo.py').write_text(
+            "REQUIRED_ARGS = [{'long': '--x', 'dest': 'x', 'type': int}]\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.setattr('sys.argv', ['tool', '--log-file', 'foo.log',
+            '--config-option', 'a.b=1', 'foo', '--x', '1',
+            '--log-level', 'DEBUG', '--config-option', 'a.c=2'])
+
+        parser, args = afscripting.args.parse_args([], [],
+            subcommands=self.SUBCOMMANDS)
+        assert args.x == 1
+        assert args.log_level == logging.DEBUG
+        # top level values aren't overwritten by subcommand defaults
+        assert args.log_file == 'foo.log'
+        assert args.config_options == {'a': {'b': '1', 'c': '2'}}
+
+    def test_fingerprint(self, tmp_path, monkeypatch):
+        (tmp_path / 'afscripting_test_foo.py').write_text(
+            "REQUIRED_ARGS = [{'long': '--x', 'dest': 'x', 'type': int}]\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        fingerprints = []
+        for argv in (['foo', '--x', '1'], ['foo', '--x', '1', '--log-level',
+                'DEBUG'], ['foo', '--x', '2']):
+            monkeypatch.setattr('sys.argv', ['tool'] + argv)
+            parser, args = afscripting.args.parse_args([], [],
+                subcommands=self.SUBCOMMANDS)
+            fingerprints.append(afscripting.cache.fingerprint(args))
+        assert fingerprints[0] == fingerprints[1]
+        assert fingerprints[0] != fingerprints[2]
+
+    def test_help_does_not_import(self, monkeypatch, capsys):
+        monkeypatch.setattr('sys.argv', ['tool', '--help'])
+        with raises(SystemExit):
+            afscripting.args.parse_args([], [], subcommands=self.SUBCOMMANDS)
+        out = capsys.readouterr().out
+        assert 'foo' in out and 'bar' in out
+
+class TestLazyHelp(object):
+
+    def test_epilog_only_generated_for_help(self, tmp_path, monkeypatch,
+            capsys):
+        calls = []
+        def post_args_outputter():
+            calls.append(1)
+            return "Available models: foo, bar"
+
+        script = tmp_path / 'script.py'
+        script.write_text('')
+        monkeypatch.setattr('sys.argv', [str(script)])
+        afscripting.args.parse_args([], [],
+            post_args_outputter=post_args_outputter)
+        assert calls == []
+
+        cache_dir = str(tmp_path / 'help-cache')
+        monkeypatch.setattr('sys.argv', [str(script), '--help'])
+        for i in range(2):
+            with raises(SystemExit):
+                afscripting.args.parse_args([], [],
+                    post_args_outputter=post_args_outputter,
+                    help_cache_dir=cache_dir)
+            assert 'Available models: foo, bar' in capsys.readouterr().out
+        # second --help is served from the cache
+        assert calls == [1]
+
+        # modifying the script invalidates the cache
+        st = os.stat(str(script))
+        os.utime(str(script), (st.st_atime, st.st_mtime + 10))
+        with raises(SystemExit):
+            afscripting.args.parse_args([], [],
+                post_args_outputter=post_args_outputter,
+                help_cache_dir=cache_dir)
+        assert calls == [1, 1]
+
+    def test_help_cache_keyed_by_caller_module(self, tmp_path, monkeypatch,
+            capsys):
+        calls = []
+        def post_args_outputter():
+            calls.append(1)
+            return "Available models: foo, bar"
+
+        script = tmp_path / 'script.py'
+        script.write_text('')
+        caller = tmp_path / 'afscripting_test_caller.py'
+        caller.write_text(
+            "import afscripting.args\n"
+            "def main(**kwargs):\n"
+            "    return afscripting.args.parse_args([], [], **kwargs)\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        caller_module = __import__('afscripting_test_caller')
+
+        cache_dir = str(tmp_path / 'help-cache')
+        monkeypatch.setattr('sys.argv', [str(script), '--help'])
+        for i in range(2):
+            with raises(SystemExit):
+                caller_module.main(post_args_outputter=post_args_outputter,
+                    help_cache_dir=cache_dir)
+        assert calls == [1]
+
+        # e.g. the package being upgraded, while the script is unchanged
+        st = os.stat(str(caller))
+        os.utime(str(caller), (st.st_atime, st.st_mtime + 10))
+        with raises(SystemExit):
+            caller_module.main(post_args_outputter=post_args_outputter,
+                help_cache_dir=cache_dir)
+        assert calls == [1, 1]
+        capsys.readouterr()
+
+class TestConfigurationOptions(object):
+
+    def test_filenames_default(self):
+        parser = argparse.ArgumentParser()
+        afscripting.args.add_configuration_options(parser)
+        args = parser.parse_args([])
+        assert args.config_file_options_filenames == []
+        # usable with the watcher even without config files
+        watcher = afscripting.configwatcher.ConfigFileWatcher(
+            args.config_file_options_filenames)
+        assert watcher.config == {}
+
+class TestParseTimeAxisAction(object):
+
+    def parse(self, value):
+        options = [{
+            "flags": ['--time-range'],
+            "kwargs": {
+                'dest': 'time_range',
+                'action': afscripting.args.ParseTimeAxisAction
+            }
+        }]
+        return parse_args(['--time-range', value], options)
+
+    def test_valid(self):
+        p = self.parse('2015-01-01T00:00:00/2015-01-01T05:00:00/2h')
+        assert len(p.time_range) == 3
+
+    def test_zero_step(self):
+        with raises(argparse.ArgumentTypeError):
+            self.parse('2015-01-01T00:00:00/2015-01-01T05:00:00/0h')
+
+    def test_end_before_start(self):
+        with raises(argparse.ArgumentTypeError):
+            self.parse('2015-01-01T05:00:00/2015-01-01T00:00:00')
+
+class TestTracingOptions(object):
+
+    def test_script_option_prefix_of_trace_output(self, monkeypatch):
+        monkeypatch.setattr('sys.argv', ['script', '--trace'])
+        parser, args = afscripting.args.parse_args([], [{
+            'long': '--trace',
+            'dest': 'trace',
+            'action': 'store_true'
+        }])
+        assert args.trace is True
+        assert args.trace_output is None
+        assert not afscripting.tracing.is_enabled()
@@ -0,0 +1,129 @@
+'''Unit tests for afscripting.cache'''
+
+__author__ = "Joel Dubowy"
+
+import argparse
+import configparser
+import datetime
+import os
+import tempfile
+
+from pytest import raises
+
+from afscripting.cache import ResultCache, fingerprint
+from afscripting.inputfiles import InputFile, InputFileGlob
+from afscripting.timeaxis import TimeAxis
+
+
+class TestFingerprint(object):
+
+    def test_key_order_independent(self):
+        a = argparse.Namespace(foo=1, config_options={'a': 1, 'b': {'c': 2}})
+        b = argparse.Namespace(config_options={'b': {'c': 2}, 'a': 1}, foo=1)
+        assert fingerprint(a) == fingerprint(b)
+        assert fingerprint(a) != fingerprint(argparse.Namespace(foo=2,
+            config_options={'a': 1, 'b': {'c': 2}}))
+
+    def test_excluded_fields(self):
+        a = argparse.Namespace(foo=1, log_file='a.log')
+        b = argparse.Namespace(foo=1, log_file='b.log')
+        assert fingerprint(a) == fingerprint(b)
+        assert fingerprint(a, exclude=[]) != fingerprint(b, exclude=[])
+        # exclusion only applies to namespace fields, not nested config
+        assert (fingerprint({'c': {'log_file': 'a.log'}})
+            != fingerprint({'c': {'log_file': 'b.log'}}))
+
+    def test_dict_key_types(self):
+        assert fingerprint({1: 'a'}) != fingerprint({'1': 'a'})
+        assert fingerprint({1: 'a', 'b': 2}) == fingerprint({'b': 2, 1: 'a'})
+
+    def test_config_parser(self):
+        def make(value):
+            config = configparser.ConfigParser()
+            config.add_section('Foo')
+            config.set('Foo', 'bar', value)
+            return argparse.Namespace(config=config)
+        assert fingerprint(make('1')) == fingerprint(make('1'))
+        assert fingerprint(make('1')) != fingerprint(make('2'))
+
+    def test_unsupported_type(self):
+        with raises(TypeError):
+            fingerprint(argparse.Namespace(foo=object()))
+
+    def test_datetime(self):
+        a = argparse.Namespace(start=datetime.datetime(2015, 1, 1))
+        b = argparse.Namespace(start=datetime.datetime(2015, 1, 2))
+        assert fingerprint(a) != fingerprint(b)
+
+    def test_types_are_distinguished(self):
+        dt = datetime.datetime(2015, 1, 1)
+        assert fingerprint(dt) != fingerprint(dt.isoformat())
+        assert fingerprint(dt.date()) != fingerprint(dt.date().isoformat())
+        assert fingerprint((1, 2)) != fingerprint([1, 2])
+        assert fingerprint({1, 2}) != fingerprint([1, 2])
+        assert fingerprint({1, 2}) == fingerprint({2, 1})
+        assert fingerprint(InputFileGlob('nonexistent-*')) != fingerprint([])
+        assert (fingerprint(TimeAxis(dt, dt)) !=
+            fingerprint([dt.isoformat(), '1:00:00', 1]))
+
+    def test_tags_dont_collide(self):
+        dt = datetime.datetime(2015, 1, 1)
+        # a dict or namespace shaped like a tagged value
+        assert fingerprint(dt) != fingerprint({'datetime': dt.isoformat()})
+        assert (fingerprint(argparse.Namespace(datetime=dt.isoformat()))
+            != fingerprint(dt))
+        assert (fingerprint(argparse.Namespace(a=1)) !=
+            fingerprint({'a': 1}))
+
+    def test_input_file_contents(self):
+        with tempfile.NamedTemporaryFile('w+t') as f:
+            f.write('foo')
+            f.flush()
+            args = argparse.Namespace(input_file=InputFile(f.name))
+            before = fingerprint(args)
+            assert fingerprint(args) == before
+            f.write('bar')
+            f.flush()
+            assert fingerprint(args) != before
+
+class TestResultCache(object):
+
+    def test_get_put(self):
+        with tempfile.TemporaryDirectory() as d:
+            cache = ResultCache(d)
+            assert cache.get('abcd') is None
+            assert 'abcd' not in cache
+            cache.put('abcd', {'a': [1, 2]})
+            assert 'abcd' in cache
+            assert cache.get('abcd') == {'a': [1, 2]}
+
+    def test_memoize(self):
+        calls = []
+        with tempfile.TemporaryDirectory() as d:
+            cache = ResultCache(d)
+
+            @cache.memoize
+            def run(args):
+                calls.append(args)
+                return args.foo * 2
+
+            a = argparse.Namespace(foo=1, log_level=10)
+            assert run(a) == 2
+            assert run(argparse.Namespace(foo=1, log_level=20)) == 2
+            assert len(calls) == 1
+            assert run(argparse.Namespace(foo=2, log_level=20)) == 4
+            assert len(calls) == 2
+
+    def test_lru_eviction(self):
+        with tempfile.TemporaryDirectory() as d:
+            cache = ResultCache(d)
+            for i, key in enumerate(['aa', 'bb', 'cc']):
+                cache.put(key, b'x' * 1000)
+                os.utime(cache._path(key), (i, i))
+            size = os.path.getsize(cache._path('aa'))
+            # 'aa' becomes the most recently used
+            cache.get('aa')
+            cache.max_size = size * 3
+            cache.put('dd', b'x' * 1000)
+            assert 'bb' not in cache
+            assert all(k in cache for k in ('aa', 'cc', 'dd'))
@@ -0,0 +1,101 @@
+'''Unit tests for afscripting.configwatcher'''
+
+__author__ = "Joel Dubowy"
+
+import json
+import logging
+import os
+import tempfile
+
+from afscripting.configwatcher import ConfigFileWatcher, diff_config_paths
+
+
+def write_config(f, config):
+    f.seek(0)
+    f.truncate()
+    f.write(json.dumps({"config": config}))
+    f.flush()
+    # make sure the change is detected even within mtime resolution
+    st = os.stat(f.name)
+    os.utime(f.name, ns=(st.st_atime_ns, st.st_mtime_ns + 1000000000))
+
+class TestDiffConfigPaths(object):
+
+    def test_no_change(self):
+        assert diff_config_paths({"a": {"b": 1}}, {"a": {"b": 1}}) == []
+
+    def test_changes(self):
+        old = {"a": {"b": 1, "c": 2}, "d": 3}
+        new = {"a": {"b": 1, "c": 4}, "e": 5}
+        assert diff_config_paths(old, new) == [
+            ("a", "c"), ("d",), ("e",)
+        ]
+
+class TestConfigFileWatcher(object):
+
+    def test_reload(self):
+        with tempfile.NamedTemporaryFile('w+t') as f1:
+            with tempfile.NamedTemporaryFile('w+t') as f2:
+                write_config(f1, {"foo": {"a": 1, "b": 2}})
+                write_config(f2, {"foo": {"b": 3}})
+                watcher = ConfigFileWatcher([f1.name, f2.name],
+                    overrides={"bar": 1})
+                assert watcher.config == {"foo": {"a": 1, "b": 3}, "bar": 1}
+
+                calls = []
+                watcher.add_callback(lambda c, p: calls.append((c, p)))
+                assert watcher.check() == []
+                assert calls == []
+
+                old_config = watcher.config
+                write_config(f1, {"foo": {"a": 10, "b": 2}})
+                assert watcher.check() == [("foo", "a")]
+                assert watcher.config == {"foo": {"a": 10, "b": 3}, "bar": 1}
+                assert calls == [(watcher.config, [("foo", "a")])]
+                # the previously published config is left untouched
+                assert old_config == {"foo": {"a": 1, "b": 3}, "bar": 1}
+
+    def test_invalid_file_keeps_last_good_config(self):
+        with tempfile.NamedTemporaryFile('w+t') as f:
+            write_config(f, {"foo": 1})
+            watcher = ConfigFileWatcher([f.name])
+            f.seek(0)
+            f.write('{"config": sdf')
+            f.flush()
+            os.utime(f.name, ns=(0, 0))
+            assert watcher.check() == []
+            assert watcher.config == {"foo": 1}
+
+    def test_log_level(self):
+        root = logging.getLogger()
+        orig_level = root.level
+        try:
+            with tempfile.NamedTemporaryFile('w+t') as f:
+                write_config(f, {"logging": {"level": "WARNING"}})
+                watcher = ConfigFileWatcher([f.name],
+                    log_level_key=("logging", "level"))
+                write_config(f, {"logging": {"level": "DEBUG"}})
+                watcher.check()
+                assert root.level == logging.DEBUG
+        finally:
+            root.setLevel(orig_level)
+
+    def test_log_level_section_added(self):
+        root = logging.getLogger()
+        orig_level = root.level
+        try:
+            root.setLevel(logging.WARNING)
+            with tempfile.NamedTemporaryFile('w+t') as f:
+                write_config(f, {"a": 1})
+                watcher = ConfigFileWatcher([f.name],
+                    log_level_key=("logging", "level"))
+                write_config(f, {"a": 1, "logging": {"level": "DEBUG"}})
+                assert watcher.check() == [("logging",)]
+                assert root.level == logging.DEBUG
+
+                # removing the section leaves the level as is
+                write_config(f, {"a": 1})
+                assert watcher.check() == [("logging",)]
+                assert root.level == logging.DEBUG
+        finally:
+            root.setLevel(orig_level)
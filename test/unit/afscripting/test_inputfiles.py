@@ -0,0 +1,67 @@
+'''Unit tests for afscripting.inputfiles'''
+
+__author__ = "Joel Dubowy"
+
+import bz2
+import gzip
+import lzma
+import os
+import tempfile
+
+from pytest import raises
+
+from afscripting.inputfiles import (
+    InputFile, InputFileGlob, iter_input_files
+)
+
+CONTENTS = ''.join('{},{},{}\n'.format(i, i * 2, i * 3)
+    for i in range(10000)).encode()
+
+class TestInputFile(object):
+
+    def setup_method(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.paths = {}
+        for ext, opener in [('', open), ('.gz', gzip.open),
+                ('.bz2', bz2.open), ('.xz', lzma.open)]:
+            path = os.path.join(self.dir.name, 'data.csv' + ext)
+            with opener(path, 'wb') as f:
+                f.write(CONTENTS)
+            self.paths[ext] = path
+
+    def teardown_method(self):
+        self.dir.cleanup()
+
+    def test_binary(self):
+        for path in self.paths.values():
+            with InputFile(path).open(chunk_size=1000, read_ahead=2) as f:
+                assert f.read() == CONTENTS
+
+    def test_text(self):
+        lines = CONTENTS.decode().splitlines(True)
+        for path in self.paths.values():
+            with InputFile(path).open('r') as f:
+                assert list(f) == lines
+
+    def test_close_before_eof(self):
+        with InputFile(self.paths['.gz']).open(chunk_size=10,
+                read_ahead=1) as f:
+            assert f.read(5) == CONTENTS[:5]
+
+    def test_empty(self):
+        path = os.path.join(self.dir.name, 'empty.csv')
+        open(path, 'w').close()
+        with InputFile(path).open() as f:
+            assert f.read() == b''
+
+    def test_mmap(self):
+        m = InputFile(self.paths['']).mmap()
+        assert m[:10] == CONTENTS[:10]
+        m.close()
+        with raises(ValueError):
+            InputFile(self.paths['.gz']).mmap()
+
+    def test_glob(self):
+        g = InputFileGlob(os.path.join(self.dir.name, 'data.csv*'))
+        assert sorted(f.path for f in iter_input_files([g])) == sorted(
+            self.paths.values())
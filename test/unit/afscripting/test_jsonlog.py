@@ -0,0 +1,46 @@
+'''Unit tests for afscripting.jsonlog'''
+
+__author__ = "Joel Dubowy"
+
+import json
+import logging
+import time
+
+from afscripting.jsonlog import JSONFormatter
+
+
+def make_record(msg, *args, exc_info=None):
+    record = logging.LogRecord('foo.bar', logging.INFO, __file__, 1,
+        msg, args, exc_info)
+    record.created = 1438786963.123
+    record.msecs = 123
+    return record
+
+class TestJSONFormatter(object):
+
+    def test_basic(self):
+        formatter = JSONFormatter()
+        line = formatter.format(make_record('a %s "b"', 'x'))
+        assert '\n' not in line
+        assert json.loads(line) == {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S',
+                time.localtime(1438786963)) + '.123',
+            'level': 'INFO',
+            'name': 'foo.bar',
+            'message': 'a x "b"'
+        }
+
+    def test_static_fields(self):
+        formatter = JSONFormatter(static_fields={'service': 'baz'})
+        d = json.loads(formatter.format(make_record('a')))
+        assert d['service'] == 'baz'
+        assert d['message'] == 'a'
+
+    def test_exc_info(self):
+        formatter = JSONFormatter()
+        try:
+            raise ValueError('sdf')
+        except ValueError as e:
+            record = make_record('a', exc_info=(type(e), e, e.__traceback__))
+        d = json.loads(formatter.format(record))
+        assert 'ValueError: sdf' in d['exc_info']
@@ -0,0 +1,96 @@
+'''Unit tests for afscripting.timeaxis'''
+
+__author__ = "Joel Dubowy"
+
+import datetime
+
+from pytest import importorskip, raises, skip
+
+from afscripting.timeaxis import TimeAxis, parse_timedelta
+
+START = datetime.datetime(2015, 1, 1, 0)
+END = datetime.datetime(2015, 1, 1, 5)
+
+class TestTimeAxis(object):
+
+    def test_hourly(self):
+        t = TimeAxis(START, END)
+        assert len(t) == 6
+        assert list(t) == [START + datetime.timedelta(hours=h)
+            for h in range(6)]
+        assert t.end == END
+
+    def test_end_not_on_step(self):
+        t = TimeAxis(START, END, datetime.timedelta(hours=2))
+        assert list(t) == [START, START + datetime.timedelta(hours=2),
+            START + datetime.timedelta(hours=4)]
+
+    def test_empty(self):
+        t = TimeAxis(END, START)
+        assert len(t) == 0
+        assert list(t) == []
+        assert t.end is None
+
+    def test_indexing(self):
+        t = TimeAxis(START, END)
+        assert t[0] == START
+        assert t[-1] == END
+        assert t[2] == datetime.datetime(2015, 1, 1, 2)
+        with raises(IndexError):
+            t[6]
+
+    def test_slicing(self):
+        t = TimeAxis(START, END)
+        s = t[1::2]
+        assert isinstance(s, TimeAxis)
+        assert list(s) == list(t)[1::2]
+        assert list(t[::-1]) == list(t)[::-1]
+        assert list(t[4:2]) == []
+
+    def test_large_range_is_lazy(self):
+        t = TimeAxis(START, datetime.datetime(2115, 1, 1),
+            datetime.timedelta(minutes=1))
+        assert len(t) > 50000000
+        assert t[-1] == datetime.datetime(2115, 1, 1)
+
+    def test_to_numpy(self):
+        numpy = importorskip('numpy')
+        t = TimeAxis(START, END)
+        a = t.to_numpy(unit='h')
+        assert a.dtype == numpy.dtype('datetime64[h]')
+        assert a.tolist() == list(t)
+
+    def test_aware_across_dst(self):
+        zoneinfo = importorskip('zoneinfo')
+        try:
+            tz = zoneinfo.ZoneInfo('America/Los_Angeles')
+        except zoneinfo.ZoneInfoNotFoundError:
+            skip("tzdata not available")
+        # clocks go from 02:00 PST to 03:00 PDT
+        start = datetime.datetime(2015, 3, 8, 0, tzinfo=tz)
+        end = datetime.datetime(2015, 3, 8, 4, tzinfo=tz)
+        t = TimeAxis(start, end)
+        assert len(t) == 4
+        assert t[0] == start
+        assert t[-1] == end
+        assert list(t) == [t[i] for i in range(4)]
+        assert [dt.astimezone(tz).hour for dt in t] == [0, 1, 3, 4]
+        assert t.start.tzinfo == datetime.timezone.utc
+
+        numpy = importorskip('numpy')
+        assert (t.to_numpy() == numpy.array([dt.replace(tzinfo=None)
+            for dt in t], dtype='datetime64[us]')).all()
+
+class TestParseTimedelta(object):
+
+    def test_valid(self):
+        assert parse_timedelta('1h') == datetime.timedelta(hours=1)
+        assert parse_timedelta('h') == datetime.timedelta(hours=1)
+        assert parse_timedelta('15m') == datetime.timedelta(minutes=15)
+        assert parse_timedelta('15min') == datetime.timedelta(minutes=15)
+        assert parse_timedelta('2d') == datetime.timedelta(days=2)
+        assert parse_timedelta('30s') == datetime.timedelta(seconds=30)
+
+    def test_invalid(self):
+        with raises(ValueError):
+            parse_timedelta('1y')
@@ -0,0 +1,96 @@
+'''Unit tests for afscripting.tracing'''
+
+__author__ = "Joel Dubowy"
+
+import atexit
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+
+from pytest import fixture
+
+from afscripting import tracing
+
+
+@fixture(autouse=True)
+def reset_tracing():
+    yield
+    tracing.disable()
+    del tracing._events[:]
+    tracing._output_file = None
+    atexit.unregister(tracing.write)
+
+def load_spans(filename):
+    with open(filename) as f:
+        events = json.load(f)['traceEvents']
+    return {e['name']: e for e in events if e['ph'] == 'X'}
+
+@tracing.traced()
+def work(n):
+    return n * 2
+
+class TestTracing(object):
+
+    def test_disabled(self):
+        with tracing.span('foo') as s:
+            pass
+        assert s is tracing._NULL_SPAN
+        assert tracing._events == []
+
+    def test_spans(self):
+        @tracing.traced()
+        def bar():
+            pass
+
+        @tracing.traced('baz', n=1)
+        def baz():
+            pass
+
+        tracing.enable()
+        with tracing.span('foo', x='y'):
+            bar()
+        t = threading.Thread(target=baz)
+        t.start()
+        t.join()
+
+        with tempfile.TemporaryDirectory() as d:
+            filename = os.path.join(d, 'trace.json')
+            tracing.write(filename)
+            spans = load_spans(filename)
+
+        assert set(spans) == {'run', 'foo', 'TestTracing.test_spans.<locals>.bar', 'baz'}
+        foo = spans['foo']
+        bar = spans['TestTracing.test_spans.<locals>.bar']
+        assert foo['args'] == {'x': 'y'}
+        assert foo['tid'] == bar['tid'] == threading.get_ident()
+        assert foo['ts'] <= bar['ts']
+        assert bar['ts'] + bar['dur'] <= foo['ts'] + foo['dur']
+        assert spans['baz']['tid'] != foo['tid']
+        assert spans['baz']['args'] == {'n': 1}
+
+    def test_fork_pool_workers(self):
+        with tempfile.TemporaryDirectory() as d:
+            filename = os.path.join(d, 'trace.json')
+            tracing.enable(filename)
+            pool = multiprocessing.get_context('fork').Pool(2)
+            try:
+                assert pool.map(work, range(8)) == list(range(0, 16, 2))
+                worker_pids = {p.pid for p in pool._pool}
+            finally:
+                pool.close()
+                pool.join()
+
+            worker_filenames = sorted(f for f in os.listdir(d)
+                if f.startswith('trace.json.'))
+            assert worker_filenames == sorted('trace.json.{}'.format(pid)
+                for pid in worker_pids)
+            n_work_spans = 0
+            for f in worker_filenames:
+                with open(os.path.join(d, f)) as fp:
+                    events = json.load(fp)['traceEvents']
+                n_work_spans += len([e for e in events
+                    if e['ph'] == 'X' and e['name'] == 'work'])
+            assert n_work_spans == 8
+            assert not os.path.exists(filename)